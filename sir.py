@@ -6,13 +6,79 @@ EGEMEN PAMUKCU
 Functions for running a simple epidemiological simulation
 '''
 
-import random
 import click
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
 
 # This seed should be used for debugging purposes only!  Do not refer
 # to it in your code.
 TEST_SEED = 20170217
 
+# Integer codes for the compact city representation.  A city is stored
+# as a numpy int16 array: negative values encode the non-infected states
+# below, and a nonnegative value d encodes an infected person on day d
+# of their infection ('Id').
+SUSCEPTIBLE = -1
+RECOVERED = -2
+VACCINATED = -3
+
+# Translation tables between state strings and state codes; infected
+# states ('Id' <-> d) are handled arithmetically.
+_STATE_CODES = {'S': SUSCEPTIBLE, 'R': RECOVERED, 'V': VACCINATED}
+_STATE_STRINGS = {code: state for (state, code) in _STATE_CODES.items()}
+
+
+def _encode(city):
+    '''
+    Convert a city from a list of state strings to an int16 array.
+
+    Inputs:
+      city (list of strings): the state of all people in the simulation
+
+    Returns (np.ndarray of int16): the encoded city
+    '''
+
+    arr = np.empty(len(city), dtype=np.int16)
+    for i, person in enumerate(city):
+        code = _STATE_CODES.get(person)
+        arr[i] = int(person[1:]) if code is None else code
+
+    return arr
+
+
+def _decode_state(code):
+    '''
+    Convert a single int16 state code back to its state string.
+
+    Inputs:
+      code (int): the encoded state of one person
+
+    Returns (string): the state string ('S', 'R', 'V', or 'Id')
+    '''
+
+    if code >= 0:
+        return 'I' + str(int(code))
+    return _STATE_STRINGS[int(code)]
+
+
+def _decode(arr):
+    '''
+    Convert an encoded int16 city array back to a list of state strings.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city
+
+    Returns (list of strings): the decoded city
+    '''
+
+    return [_decode_state(code) for code in arr]
+
+
 def count_infected(city):
     '''
     Count the number of infected people
@@ -24,12 +90,7 @@ def count_infected(city):
       currently infected
     '''
 
-    num_infected = 0
-    for ind in city:
-        if 'I' in ind:
-            num_infected += 1
-
-    return num_infected
+    return int(np.count_nonzero(_encode(city) >= 0))
 
 
 def has_an_infected_neighbor(city, position):
@@ -46,22 +107,57 @@ def has_an_infected_neighbor(city, position):
     '''
 
     # This function should only be called when the person at position
-    # is susceptible to infection.
+    # is susceptible to infection.  (asserts are compiled out under -O,
+    # so this costs nothing in optimized runs)
     assert city[position] == "S"
 
-    infected_neighbor = False
-    if position == 0 and len(city) > 1 and 'I' in city[1]:
-        infected_neighbor = True
-    elif position == 0 and len(city) > 1 and 'I' not in city[1]:
-        infected_neighbor = False
-    elif position == (len(city) - 1) and 'I' in city[len(city) - 2]:
-        infected_neighbor = True
-    elif position == (len(city) - 1) and 'I' not in city[len(city) - 2]:
-        infected_neighbor = False
-    elif position > 0 and ('I' in city[position - 1] or 'I' in city[position + 1]):
-        infected_neighbor = True
+    n = len(city)
+    return ((position > 0 and 'I' in city[position - 1]) or
+            (position < n - 1 and 'I' in city[position + 1]))
+
 
-    return infected_neighbor
+def _has_an_infected_neighbor(arr, position):
+    '''
+    Determine whether a person has an infected neighbor, operating on
+    the encoded int16 city array.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city
+      position (int): the position of the person to check
+
+    Returns:
+      True, if the person has an infected neighbor, False otherwise.
+    '''
+
+    n = arr.shape[0]
+    return ((position > 0 and arr[position - 1] >= 0) or
+            (position < n - 1 and arr[position + 1] >= 0))
+
+
+def _advance_person_at_position(arr, position, days_contagious):
+    '''
+    Compute the next state code for the person at the specified
+    position, operating on the encoded int16 city array.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city
+      position (int): the position of the person to check
+      days_contagious (int): the number of a days a person is infected
+
+    Returns (int): encoded disease state of the person after one day
+    '''
+
+    state = arr[position]
+    if state >= 0:
+        next_state = state + 1
+        if next_state >= days_contagious:
+            next_state = RECOVERED
+    elif state == SUSCEPTIBLE and _has_an_infected_neighbor(arr, position):
+        next_state = 0
+    else:
+        next_state = state
+
+    return next_state
 
 
 def advance_person_at_position(city, position, days_contagious):
@@ -77,16 +173,9 @@ def advance_person_at_position(city, position, days_contagious):
     Returns: (string) disease state of the person after one day
     '''
 
-    if 'I' in city[position] and int(city[position][1:]) + 1 >= days_contagious:
-        next_state = 'R'
-    elif 'I' in city[position] and int(city[position][1:]) + 1 < days_contagious:
-        next_state = ''.join(['I',str(int(city[position][1:]) + 1)])
-    elif 'S' == city[position] and has_an_infected_neighbor(city,position) == True:
-        next_state = 'I0'
-    else:
-        next_state = city[position]
-
-    return next_state
+    arr = _encode(city)
+    return _decode_state(_advance_person_at_position(arr, position,
+                                                     days_contagious))
 
 
 def simulate_one_day(starting_city, days_contagious):
@@ -102,13 +191,374 @@ def simulate_one_day(starting_city, days_contagious):
       new_city (list): disease state of the city after one day
     '''
 
-    new_city = []
-    i = 0
-    for ind in starting_city:
-        new_city.append(advance_person_at_position(starting_city, i, days_contagious))
-        i += 1
+    arr, _ = _simulate_one_day(_encode(starting_city), days_contagious)
+    return _decode(arr)
+
+
+def _simulate_one_day(arr, days_contagious):
+    '''
+    Move the simulation forward a single day, operating on the encoded
+    int16 city array.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city at the start of the day
+      days_contagious (int): the number of a days a person is infected
+
+    Returns tuple (np.ndarray of int16, int): the encoded city after one
+      day and the number of people still infected.
+    '''
+
+    out = np.empty_like(arr)
+    num_infected = _get_day_kernel(days_contagious)(arr, out)
+    return (out, num_infected)
+
+
+def _infected_neighbor_mask(arr):
+    '''
+    Compute, for every person at once, whether they have an infected
+    neighbor.  The "is infected" flags are packed into uint64 words (64
+    people per word) and each word is ORed with itself shifted one bit
+    in each direction, carrying the edge bits between adjacent words, so
+    the neighbor check costs a few instructions per 64 people.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city
+
+    Returns (np.ndarray of bool): True where a neighbor is infected
+    '''
+
+    n = arr.shape[0]
+    packed = np.packbits(arr >= 0, bitorder='little')
+    pad = (-packed.size) % 8
+    if pad:
+        packed = np.concatenate((packed, np.zeros(pad, dtype=np.uint8)))
+    words = packed.view(np.uint64)
+
+    left = words << np.uint64(1)
+    left[1:] |= words[:-1] >> np.uint64(63)
+    right = words >> np.uint64(1)
+    right[:-1] |= words[1:] << np.uint64(63)
+
+    neighbor = (left | right).view(np.uint8)
+    return np.unpackbits(neighbor, count=n, bitorder='little').astype(bool)
+
+
+def _simulate_one_day_np(arr, out, days_contagious):
+    '''
+    Vectorized numpy version of the day update: neighbor detection via
+    the packed-bitmap mask, so the whole day is a handful of array ops.
+    Used when numba is not available.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city at the start of the day
+      out (np.ndarray of int16): buffer for the encoded city after one day
+      days_contagious (int): the number of a days a person is infected
+
+    Returns (int): the number of infected people after the day
+    '''
+
+    infected = arr >= 0
+    has_infected_nbr = _infected_neighbor_mask(arr)
+
+    np.copyto(out, arr)
+    np.add(arr, 1, out=out, where=infected)
+    recovering = infected & (out >= days_contagious)
+    newly_infected = (arr == SUSCEPTIBLE) & has_infected_nbr
+    out[recovering] = RECOVERED
+    out[newly_infected] = 0
+
+    # Delta-update the infected count from the transition masks rather
+    # than rescanning the output array.
+    return int(np.count_nonzero(infected) - np.count_nonzero(recovering)
+               + np.count_nonzero(newly_infected))
+
+
+def _simulate_one_day_nb(arr, out, days_contagious):
+    '''
+    Compute one day of the simulation in a single pass over the encoded
+    city, writing the result into a caller-supplied buffer.  Compiled
+    with numba when it is available; the pure-Python fallback has the
+    same semantics.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city at the start of the day
+      out (np.ndarray of int16): buffer for the encoded city after one day
+      days_contagious (int): the number of a days a person is infected
+
+    Returns (int): the number of infected people after the day, counted
+      in the same pass that writes the new states.
+    '''
 
-    return new_city
+    n = arr.shape[0]
+    if n == 0:
+        return 0
+
+    # Interior cells have both neighbors, so every transition can be
+    # written as branch-free arithmetic on boolean flags (the three
+    # cases are disjoint), which lets the compiler vectorize the loop.
+    num_infected = 0
+    for i in range(1, n - 1):
+        state = arr[i]
+        is_infected = state >= 0
+        advanced = state + is_infected
+        recovers = is_infected & (advanced >= days_contagious)
+        catches = ((state == SUSCEPTIBLE) &
+                   ((arr[i - 1] >= 0) | (arr[i + 1] >= 0)))
+        out[i] = RECOVERED * recovers + (1 - recovers - catches) * advanced
+        num_infected += is_infected + catches - recovers
+
+    # The two boundary cells each miss a neighbor; handle them
+    # explicitly.
+    state = arr[0]
+    if state >= 0:
+        next_state = state + 1
+        if next_state >= days_contagious:
+            next_state = RECOVERED
+    elif state == SUSCEPTIBLE and n > 1 and arr[1] >= 0:
+        next_state = 0
+    else:
+        next_state = state
+    out[0] = next_state
+    if next_state >= 0:
+        num_infected += 1
+
+    if n > 1:
+        state = arr[n - 1]
+        if state >= 0:
+            next_state = state + 1
+            if next_state >= days_contagious:
+                next_state = RECOVERED
+        elif state == SUSCEPTIBLE and arr[n - 2] >= 0:
+            next_state = 0
+        else:
+            next_state = state
+        out[n - 1] = next_state
+        if next_state >= 0:
+            num_infected += 1
+
+    return num_infected
+
+
+if njit is not None:
+    # Compile eagerly (the signature is declared up front) so the JIT
+    # cost is paid at import time, and cache the machine code on disk.
+    _simulate_one_day_nb = njit('int64(int16[:], int16[:], int64)',
+                                cache=True)(_simulate_one_day_nb)
+
+try:
+    # Prefer the ahead-of-time compiled kernel when it has been built
+    # (see sir_aot.py): same code, no JIT warm-up at all.
+    from sir_kernels import simulate_one_day_nb as _day_kernel
+    _have_aot = True
+except ImportError:
+    _day_kernel = (_simulate_one_day_nb if njit is not None
+                   else _simulate_one_day_np)
+    _have_aot = False
+
+# Day kernels specialized for a fixed days_contagious, keyed by value.
+_day_kernels = {}
+
+
+def _get_day_kernel(days_contagious):
+    '''
+    Return a day kernel (arr, out) -> number infected for a fixed
+    days_contagious.  With numba, the kernel is recompiled per
+    days_contagious value with it closed over as a compile-time
+    constant, so the terminal-state comparison is folded by the
+    compiler; the compiled kernels are cached both in-process and on
+    disk.  Without numba (or when the ahead-of-time build is present,
+    which has no warm-up to amortize), the generic kernel is wrapped.
+
+    Inputs:
+      days_contagious (int): the number of a days a person is infected
+
+    Returns: a callable (arr, out) -> int
+    '''
+
+    kernel = _day_kernels.get(days_contagious)
+    if kernel is not None:
+        return kernel
+
+    if njit is None or _have_aot:
+        def kernel(arr, out):
+            return _day_kernel(arr, out, days_contagious)
+    else:
+        # Same branchless loop as _simulate_one_day_nb, with
+        # days_contagious a closed-over constant instead of an
+        # argument.
+        @njit('int64(int16[:], int16[:])', cache=True)
+        def kernel(arr, out):
+            n = arr.shape[0]
+            if n == 0:
+                return 0
+
+            num_infected = 0
+            for i in range(1, n - 1):
+                state = arr[i]
+                is_infected = state >= 0
+                advanced = state + is_infected
+                recovers = is_infected & (advanced >= days_contagious)
+                catches = ((state == SUSCEPTIBLE) &
+                           ((arr[i - 1] >= 0) | (arr[i + 1] >= 0)))
+                out[i] = (RECOVERED * recovers
+                          + (1 - recovers - catches) * advanced)
+                num_infected += is_infected + catches - recovers
+
+            state = arr[0]
+            if state >= 0:
+                next_state = state + 1
+                if next_state >= days_contagious:
+                    next_state = RECOVERED
+            elif state == SUSCEPTIBLE and n > 1 and arr[1] >= 0:
+                next_state = 0
+            else:
+                next_state = state
+            out[0] = next_state
+            if next_state >= 0:
+                num_infected += 1
+
+            if n > 1:
+                state = arr[n - 1]
+                if state >= 0:
+                    next_state = state + 1
+                    if next_state >= days_contagious:
+                        next_state = RECOVERED
+                elif state == SUSCEPTIBLE and arr[n - 2] >= 0:
+                    next_state = 0
+                else:
+                    next_state = state
+                out[n - 1] = next_state
+                if next_state >= 0:
+                    num_infected += 1
+
+            return num_infected
+
+    _day_kernels[days_contagious] = kernel
+    return kernel
+
+
+# Tiling parameters for very large cities: cities of at least
+# _TILE_MIN_CITY cells are stepped _TILE_DAYS days at a time in
+# _TILE_CELLS-cell tiles (32 KB of int16, comfortably cache-resident)
+# rather than streaming the whole array once per day.
+_TILE_CELLS = 16384
+_TILE_DAYS = 8
+_TILE_MIN_CITY = 1 << 20
+
+
+def _simulate_block_nb(arr, out, days_contagious, num_days):
+    '''
+    Advance the simulation num_days days, tile by tile.  Each tile of
+    the city, plus a halo of num_days cells on each side (a cell's
+    state after d days depends on cells up to d away), is copied into a
+    small scratch buffer and stepped num_days times before moving to
+    the next tile, so the tile stays cache-resident across the days
+    instead of the whole city being streamed once per day.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city at the start
+      out (np.ndarray of int16): buffer for the city after num_days days
+      days_contagious (int): the number of a days a person is infected
+      num_days (int): the number of days to advance
+
+    Returns (np.ndarray of int64): the number of infected people after
+      each of the num_days days
+    '''
+
+    n = arr.shape[0]
+    counts = np.zeros(num_days, dtype=np.int64)
+    cur = np.empty(_TILE_CELLS + 2 * num_days, dtype=np.int16)
+    nxt = np.empty_like(cur)
+    for start in range(0, n, _TILE_CELLS):
+        stop = min(start + _TILE_CELLS, n)
+        lo = max(0, start - num_days)
+        hi = min(n, stop + num_days)
+        cur[:hi - lo] = arr[lo:hi]
+
+        # [valid_lo, valid_hi) is the global range whose states are
+        # correct for the current day; it shrinks by one cell per day
+        # from each side that is not a real city boundary.
+        valid_lo, valid_hi = lo, hi
+        for d in range(num_days):
+            new_lo = valid_lo + 1 if valid_lo > 0 else 0
+            new_hi = valid_hi - 1 if valid_hi < n else n
+            tile_count = 0
+            for g in range(new_lo, new_hi):
+                j = g - lo
+                state = cur[j]
+                if state >= 0:
+                    next_state = state + 1
+                    if next_state >= days_contagious:
+                        next_state = RECOVERED
+                elif state == SUSCEPTIBLE:
+                    if ((g > 0 and cur[j - 1] >= 0) or
+                            (g < n - 1 and cur[j + 1] >= 0)):
+                        next_state = 0
+                    else:
+                        next_state = state
+                else:
+                    next_state = state
+                nxt[j] = next_state
+                if next_state >= 0 and start <= g < stop:
+                    tile_count += 1
+            counts[d] += tile_count
+            cur, nxt = nxt, cur
+            valid_lo, valid_hi = new_lo, new_hi
+
+        out[start:stop] = cur[start - lo:stop - lo]
+
+    return counts
+
+
+if njit is not None:
+    _simulate_block_nb = njit(cache=True)(_simulate_block_nb)
+
+
+def _run_days(arr, days_contagious, max_days):
+    '''
+    Run the day loop on an encoded city until no infections remain or
+    max_days days have been simulated.  Large cities go through the
+    tiled multi-day kernel; everything else steps one day at a time
+    with two swapped buffers.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city (consumed as scratch)
+      days_contagious (int): the number of a days a person is infected
+      max_days (int): the maximum number of days to simulate
+
+    Returns tuple (np.ndarray of int16, int): the final encoded city
+      and the number of days actually simulated.
+    '''
+
+    num_infected = int(np.count_nonzero(arr >= 0))
+    out = np.empty_like(arr)
+    duration = 0
+
+    if njit is not None and arr.shape[0] >= _TILE_MIN_CITY:
+        while num_infected > 0 and duration < max_days:
+            block = min(_TILE_DAYS, max_days - duration)
+            counts = _simulate_block_nb(arr, out, days_contagious, block)
+            arr, out = out, arr
+            # Once a day inside the block hits zero infections the
+            # remaining days are no-ops, so the final array is still
+            # correct; only the duration has to stop at that day.
+            num_infected = int(counts[block - 1])
+            days_run = block
+            for d in range(block):
+                if counts[d] == 0:
+                    num_infected = 0
+                    days_run = d + 1
+                    break
+            duration += days_run
+        return (arr, duration)
+
+    day_kernel = _get_day_kernel(days_contagious)
+    while num_infected > 0 and duration < max_days:
+        num_infected = day_kernel(arr, out)
+        arr, out = out, arr
+        duration += 1
+
+    return (arr, duration)
 
 
 def run_simulation(starting_city, days_contagious,
@@ -128,22 +578,34 @@ def run_simulation(starting_city, days_contagious,
       and the number of days actually simulated.
     '''
 
-    duration = 0
-    random.seed(random_seed)
-    ending_city = vaccinate_city(starting_city, vaccine_effectiveness)
-    for idx in range(len(starting_city) + days_contagious):
-        if 'I' not in ''.join(ending_city):
-            break
-        else:
-            ending_city = simulate_one_day(ending_city, days_contagious)
-            duration += 1
- 
-        
-    return (ending_city, duration)
+    arr, duration = _run_simulation_raw(starting_city, days_contagious,
+                                        random_seed, vaccine_effectiveness)
+    return (_decode(arr), duration)
+
+
+def _run_simulation_raw(starting_city, days_contagious,
+                        random_seed=None, vaccine_effectiveness=0.0):
+    '''
+    Run the entire simulation, returning the final city in its encoded
+    form.  Callers that only need the duration (or already work on the
+    encoded representation) use this to skip decoding the final city
+    into N strings.
+
+    Inputs: as for run_simulation.
+
+    Returns tuple (np.ndarray of int16, int): the final encoded city
+      and the number of days actually simulated.
+    '''
+
+    rng = np.random.default_rng(random_seed)
+    arr = _encode(starting_city)
+    _vaccinate(arr, rng.random(arr.shape[0]), vaccine_effectiveness)
+    return _run_days(arr, days_contagious,
+                     len(starting_city) + days_contagious)
 
 
 
-def vaccinate_city(starting_city, vaccine_effectiveness):
+def vaccinate_city(starting_city, vaccine_effectiveness, random_seed=None):
     '''
     Vaccinate everyone in a city
 
@@ -152,18 +614,31 @@ def vaccinate_city(starting_city, vaccine_effectiveness):
         start of the simulation
       vaccine_effectiveness (float): the chance that a vaccination will be
         effective
+      random_seed (int): the random seed for the vaccination draws
 
     Returns:
       new_city (list): state of the city after vaccinating everyone in the city
     '''
 
-    new_city = starting_city[:]
-    for (x, item) in enumerate(new_city):
-        if item == 'S':
-            if random.random() < vaccine_effectiveness:
-                new_city[x] = 'V'
+    arr = _encode(starting_city)
+    rng = np.random.default_rng(random_seed)
+    _vaccinate(arr, rng.random(arr.shape[0]), vaccine_effectiveness)
+    return _decode(arr)
+
 
-    return new_city
+def _vaccinate(arr, draws, vaccine_effectiveness):
+    '''
+    Vaccinate the encoded city in place: one pre-drawn uniform value per
+    person, applied to the susceptible people with a mask.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded city
+      draws (np.ndarray of float64): one uniform draw per person
+      vaccine_effectiveness (float): the chance that a vaccination will
+        be effective
+    '''
+
+    arr[(arr == SUSCEPTIBLE) & (draws < vaccine_effectiveness)] = VACCINATED
 
 
 def calc_avg_days_to_zero_infections(
@@ -191,17 +666,113 @@ def calc_avg_days_to_zero_infections(
     '''
     assert num_trials > 0
 
+    arr = _encode(starting_city)
+    if np.count_nonzero(arr >= 0) == 0:
+        # No infections to begin with: every trial lasts zero days.
+        return 0.0
+    if vaccine_effectiveness == 0.0:
+        # The random seed only influences vaccination, which is a no-op
+        # here, so every trial is identical: run just one.
+        return float(_run_simulation_raw(starting_city, days_contagious,
+                                         random_seed,
+                                         vaccine_effectiveness)[1])
+
+    if njit is not None:
+        draws = _vaccine_draws(arr, random_seed, num_trials)
+        durations = _run_trials_nb(arr, days_contagious, draws,
+                                   vaccine_effectiveness,
+                                   len(starting_city) + days_contagious)
+        return float(durations.mean())
+
     duration_list = []
     avg_days = 0
     for i in range(num_trials):
-        duration_list.append(run_simulation(starting_city, days_contagious, random_seed, vaccine_effectiveness)[1])
+        duration_list.append(_run_simulation_raw(
+            starting_city, days_contagious, random_seed,
+            vaccine_effectiveness)[1])
         random_seed += 1
-    
+
     avg_days = sum(duration_list)/len(duration_list)
 
     return (avg_days)
 
 
+def _vaccine_draws(arr, random_seed, num_trials):
+    '''
+    Generate the vaccination random draws for every trial up front, one
+    row per trial and one draw per person, using the same seeding scheme
+    as the sequential trials (seed, seed + 1, ...).
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded starting city
+      random_seed (int): the random seed for the first trial
+      num_trials (int): the number of trials to run
+
+    Returns (np.ndarray of float64): num_trials x num_people draws
+    '''
+
+    n = arr.shape[0]
+    draws = np.empty((num_trials, n))
+    for t in range(num_trials):
+        rng = np.random.default_rng(random_seed if random_seed is None
+                                    else random_seed + t)
+        draws[t] = rng.random(n)
+
+    return draws
+
+
+def _run_trials_nb(arr, days_contagious, draws, vaccine_effectiveness,
+                   max_days):
+    '''
+    Run the Monte Carlo trials, one per row of draws.  The trials are
+    independent, so with numba the loop over trials is compiled with
+    parallel=True and spread across CPU cores.
+
+    Inputs:
+      arr (np.ndarray of int16): the encoded starting city
+      days_contagious (int): the number of a days a person is infected
+      draws (np.ndarray of float64): vaccination draws from
+        _vaccine_draws
+      vaccine_effectiveness (float): the chance that a vaccination will
+        be effective
+      max_days (int): the maximum number of days per trial
+
+    Returns (np.ndarray of int64): the duration of each trial
+    '''
+
+    num_trials = draws.shape[0]
+    n = arr.shape[0]
+    durations = np.empty(num_trials, dtype=np.int64)
+    for t in prange(num_trials):
+        city = arr.copy()
+        out = np.empty_like(city)
+
+        num_infected = 0
+        for i in range(n):
+            if city[i] == SUSCEPTIBLE:
+                if draws[t, i] < vaccine_effectiveness:
+                    city[i] = VACCINATED
+            elif city[i] >= 0:
+                num_infected += 1
+
+        duration = 0
+        for day in range(max_days):
+            if num_infected == 0:
+                break
+            num_infected = _simulate_one_day_nb(city, out, days_contagious)
+            city, out = out, city
+            duration += 1
+        durations[t] = duration
+
+    return durations
+
+
+if njit is not None:
+    _run_trials_nb = njit(
+        'int64[:](int16[:], int64, float64[:, :], float64, int64)',
+        parallel=True, cache=True)(_run_trials_nb)
+
+
 
 ################ Do not change the code below this line #######################
 
@@ -0,0 +1,27 @@
+'''
+Epidemic modelling
+
+Ahead-of-time compilation of the hot simulation kernel in sir.py.
+
+Running
+
+    python sir_aot.py
+
+builds a sir_kernels extension module next to sir.py.  When that module
+is present, sir.py imports the precompiled day kernel from it instead of
+JIT-compiling, which removes the one-time numba compilation cost from
+every process start.  The trial kernel is not exported because pycc does
+not support parallel=True; it stays JIT-compiled with a disk cache.
+'''
+
+from numba.pycc import CC
+
+import sir
+
+cc = CC('sir_kernels')
+cc.export('simulate_one_day_nb',
+          'int64(int16[:], int16[:], int64)')(sir._simulate_one_day_nb.py_func)
+
+
+if __name__ == '__main__':
+    cc.compile()
@@ -0,0 +1,147 @@
+'''
+Epidemic modelling
+
+Optional CUDA path for massive Monte Carlo sweeps.  All trials are kept
+on the GPU as one (num_trials, n) int16 array; one CUDA block advances
+one trial per day, and the host loop records each trial's duration when
+its infected count first reaches zero.
+
+Vaccination draws come from the GPU xoroshiro128+ generator, so results
+are statistically equivalent, but not bit-identical, to the CPU path in
+sir.calc_avg_days_to_zero_infections.  Requires a CUDA-capable GPU; use
+is_available() to check before calling.
+'''
+
+import numpy as np
+from numba import cuda
+from numba.cuda.random import (create_xoroshiro128p_states,
+                               xoroshiro128p_uniform_float32)
+
+from sir import SUSCEPTIBLE, VACCINATED, RECOVERED, _encode
+
+# Threads per block; each block owns one trial and its threads stride
+# over the cells of that trial's city.
+_THREADS_PER_BLOCK = 128
+
+
+def is_available():
+    '''
+    Determine whether the CUDA path can be used on this machine.
+
+    Returns: True if a usable CUDA GPU is present, False otherwise.
+    '''
+
+    try:
+        return cuda.is_available()
+    except Exception:
+        return False
+
+
+@cuda.jit
+def _vaccinate_kernel(cities, rng_states, vaccine_effectiveness):
+    '''
+    Vaccinate every trial's city in place, one thread per person, with
+    an independent uniform draw per (trial, person) pair.
+    '''
+
+    num_trials, n = cities.shape
+    flat = cuda.grid(1)
+    if flat < num_trials * n:
+        t = flat // n
+        i = flat - t * n
+        if cities[t, i] == SUSCEPTIBLE:
+            draw = xoroshiro128p_uniform_float32(rng_states, flat)
+            if draw < vaccine_effectiveness:
+                cities[t, i] = VACCINATED
+
+
+@cuda.jit
+def _simulate_one_day_kernel(cities, out, days_contagious, counts):
+    '''
+    Advance every trial one day.  Block t updates trial t, with its
+    threads striding over the cells; each trial's infected count is
+    accumulated into counts[t].
+    '''
+
+    t = cuda.blockIdx.x
+    n = cities.shape[1]
+    num_infected = 0
+    for i in range(cuda.threadIdx.x, n, cuda.blockDim.x):
+        state = cities[t, i]
+        if state >= 0:
+            next_state = state + 1
+            if next_state >= days_contagious:
+                next_state = RECOVERED
+        elif state == SUSCEPTIBLE:
+            if ((i > 0 and cities[t, i - 1] >= 0) or
+                    (i < n - 1 and cities[t, i + 1] >= 0)):
+                next_state = 0
+            else:
+                next_state = state
+        else:
+            next_state = state
+        out[t, i] = next_state
+        if next_state >= 0:
+            num_infected += 1
+
+    cuda.atomic.add(counts, t, num_infected)
+
+
+def calc_avg_days_to_zero_infections(
+        starting_city, days_contagious,
+        random_seed, vaccine_effectiveness,
+        num_trials):
+    '''
+    GPU version of sir.calc_avg_days_to_zero_infections: run N trials
+    with the specified vaccine effectiveness and calculate the average
+    number of days for a city to reach zero infections.
+
+    Inputs:
+      starting_city (list): the state of all people in the city at the
+        start of the simulation
+      days_contagious (int): the number of a days a person is infected
+      random_seed (int): the random seed for the vaccination draws
+      vaccine_effectiveness (float): the chance that a vaccination will be
+        effective
+      num_trials (int): the number of trials to run
+
+    Returns (float): the average number of days for a city to reach zero
+      infections
+    '''
+
+    assert num_trials > 0
+
+    arr = _encode(starting_city)
+    n = arr.shape[0]
+    if int(np.count_nonzero(arr >= 0)) == 0:
+        return 0.0
+
+    cities = cuda.to_device(np.tile(arr, (num_trials, 1)))
+    out = cuda.device_array_like(cities)
+    if random_seed is None:
+        random_seed = np.random.randint(0, 2 ** 31)
+    rng_states = create_xoroshiro128p_states(num_trials * n,
+                                             seed=random_seed)
+    blocks = (num_trials * n + _THREADS_PER_BLOCK - 1) // _THREADS_PER_BLOCK
+    _vaccinate_kernel[blocks, _THREADS_PER_BLOCK](
+        cities, rng_states, vaccine_effectiveness)
+
+    zeros = np.zeros(num_trials, dtype=np.int64)
+    counts = cuda.to_device(zeros)
+    durations = np.zeros(num_trials, dtype=np.int64)
+    done = np.zeros(num_trials, dtype=bool)
+    max_days = n + days_contagious
+    for day in range(max_days):
+        counts.copy_to_device(zeros)
+        _simulate_one_day_kernel[num_trials, _THREADS_PER_BLOCK](
+            cities, out, days_contagious, counts)
+        cities, out = out, cities
+        host_counts = counts.copy_to_host()
+        finished = ~done & (host_counts == 0)
+        durations[finished] = day + 1
+        done |= finished
+        if done.all():
+            break
+    durations[~done] = max_days
+
+    return float(durations.mean())